@@ -1,4 +1,8 @@
 import os
+import re
+import math
+import time
+import hashlib
 from langchain.chains import RetrievalQA
 from langchain_community.vectorstores import Chroma
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
@@ -6,27 +10,203 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import TextLoader
 from langchain.prompts import PromptTemplate
 from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.documents import Document
+from typing import Any, Callable, Dict, List, Optional
+from chroma_db import ChromaDB
+from transcription_checkpoint import chunk_offset
+from video_summarizer import is_summary_question, load_summary_tree, format_summary_answer
+
+
+# Hardcoded API key
+API_KEY = "your-api-key"
+
+
+def create_llm(api_key: str = API_KEY) -> ChatOpenAI:
+   """Chat model shared by Q&A and ingestion-time summaries"""
+   return ChatOpenAI(
+       temperature=0.3,
+       openai_api_key=api_key,
+       model="gpt-3.5-turbo-16k",  # Using 16k context for longer videos
+       max_tokens=2000
+   )
+
+
+def create_embeddings(api_key: str = API_KEY) -> OpenAIEmbeddings:
+   return OpenAIEmbeddings(
+       openai_api_key=api_key,
+       model="text-embedding-3-small"
+   )
+
+
+def transcript_fingerprint(path: str) -> Optional[str]:
+   """Content hash of a transcript file, so a re-transcribed video is re-indexed"""
+   if not os.path.exists(path):
+       return None
+   with open(path, 'rb') as f:
+       return hashlib.sha1(f.read()).hexdigest()
+
+
+def video_store(db: ChromaDB, video_id: str, embeddings) -> Chroma:
+   """LangChain view over the shard collection that holds this video"""
+   return Chroma(
+       client=db.client,
+       collection_name=db.shard_name(video_id),
+       embedding_function=embeddings,
+       collection_metadata={"hnsw:space": "cosine"}
+   )
+
+
+class IncrementalIndexer:
+   """
+   Embeds each transcribed chunk into the video's shard while transcription
+   is still running, so questions can be answered before the whole video is done.
+   Chunks are buffered and embedded `batch_chunks` at a time.
+   """
+   def __init__(self, video_id: str, batch_chunks: int = 1, db: Optional[ChromaDB] = None, embeddings=None,
+                flush_attempts: int = 3, sleep: Callable[[float], None] = time.sleep):
+       self.video_id = video_id
+       self.batch_chunks = batch_chunks
+       self.flush_attempts = flush_attempts
+       self.sleep = sleep
+       self.db = db or ChromaDB()
+       self.embeddings = embeddings or create_embeddings()
+       self.store = video_store(self.db, video_id, self.embeddings)
+       self._pending = []
+       progress = self.db.get_progress(video_id)
+       self.indexed_ids = set(self.store.get(where={"video_id": video_id}, include=[])["ids"])
+       # Nothing to do for a video whose index was recorded as complete
+       self.skip = bool(self.indexed_ids) and progress is not None and progress["complete"]
+       if self.indexed_ids and progress is None:
+           # Leftovers of an index that never completed
+           self.db.delete_vectors(video_id)
+           self.store = video_store(self.db, video_id, self.embeddings)
+           self.indexed_ids = set()
+       self.indexed_until = progress["indexed_until"] if progress and not progress["complete"] else 0.0
+
+   def chunk_id(self, chunk: Dict) -> str:
+       return f"{self.video_id}_chunk_{chunk_offset(chunk)}"
+
+   def add_chunk(self, chunk: Dict, segments: List[Dict]):
+       """transcribe_chunks callback: queue one finished chunk for embedding"""
+       # Chunks indexed by an earlier, interrupted run don't need embedding again
+       if self.skip or self.chunk_id(chunk) in self.indexed_ids:
+           return
+       self._pending.append((chunk, segments))
+       if len(self._pending) >= self.batch_chunks:
+           self.flush()
+
+   def flush(self) -> bool:
+       """Embed the queued chunks; False (chunks kept queued) if the store rejected them"""
+       if not self._pending:
+           return True
+       documents, ids = [], []
+       for chunk, segments in self._pending:
+           if segments:
+               documents.append(Document(
+                   page_content="\n".join(
+                       f"[{s['start']:.2f}-{s['end']:.2f}] {s['text']}" for s in segments
+                   ),
+                   metadata={"video_id": self.video_id, "start": chunk['start'], "end": chunk['end']}
+               ))
+               ids.append(self.chunk_id(chunk))
+       try:
+           if documents:
+               self.store.add_documents(documents, ids=ids)
+           self.indexed_ids.update(ids)
+           self.indexed_until = max([self.indexed_until] + [chunk['end'] for chunk, _ in self._pending])
+           # The progress record first appears here, once something is actually indexed
+           self.db.set_progress(self.video_id, self.indexed_until, complete=False)
+           self._pending = []
+           return True
+       except Exception as e:
+           # Keep the chunks queued; they are retried with the next batch or at finish()
+           print(f"⚠️ Incremental indexing failed: {str(e)}")
+           return False
+
+   def abort(self):
+       """Transcription failed: forget the partial progress so Q&A doesn't wait on it"""
+       self._pending = []
+       if not self.skip:
+           self.db.clear_progress(self.video_id)
+
+   def finish(self, transcription_path: str) -> bool:
+       """
+       Embed what is left and mark the video as fully indexed from this transcript.
+       Returns False if the last chunks could not be embedded; the record then names
+       the finished transcript, and VideoQAAgent rebuilds the index from it.
+       """
+       if self.skip:
+           return True
+       fingerprint = transcript_fingerprint(transcription_path)
+       # From here on the transcript is final, whatever happens to the last flush
+       self.db.set_progress(self.video_id, self.indexed_until, complete=False, transcript=fingerprint)
+       for attempt in range(self.flush_attempts):
+           if attempt:
+               self.sleep(2 ** (attempt - 1))
+           if self.flush():
+               self.db.set_progress(self.video_id, self.indexed_until, complete=True, transcript=fingerprint)
+               return True
+       print(f"⚠️ Index of {self.video_id} is incomplete; it will be rebuilt from the transcript on the first question")
+       return False
+
+
+class MultiVideoRetriever(BaseRetriever):
+   """Embeds the query once and merges top-k hits from each shard, filtered to the target videos"""
+   embeddings: Any
+   routes: List[Any]
+   k: int = 4
+
+   def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+       query_embedding = self.embeddings.embed_query(query)
+       scored = []
+       for store, where in self.routes:
+           scored.extend(store.similarity_search_by_vector_with_relevance_scores(
+               query_embedding, k=self.k, filter=where
+           ))
+       # Chroma returns distances, so smaller is closer
+       scored.sort(key=lambda pair: pair[1])
+       return [doc for doc, _ in scored[:self.k]]
+
+
+def video_retriever(db: ChromaDB, video_ids: List[str], store_for: Callable[[str], Chroma], embeddings, k: int = 4):
+   """
+   Retriever over `video_ids`: a filtered search of the video's shard for one
+   video, or one search per shard merged by MultiVideoRetriever for several.
+   """
+   if len(video_ids) == 1:
+       return store_for(video_ids[0]).as_retriever(
+           search_kwargs={"k": k, "filter": {"video_id": video_ids[0]}}
+       )
+   groups = {}
+   for video_id in video_ids:
+       groups.setdefault(db.shard_name(video_id), []).append(video_id)
+   routes = [(store_for(ids[0]), ChromaDB.video_filter(ids)) for ids in groups.values()]
+   return MultiVideoRetriever(embeddings=embeddings, routes=routes, k=k)
 
 
 class VideoQAAgent:
-   def __init__(self):
-       # Hardcoded API key
-       self.api_key = "your-api-key"
+   def __init__(self, video_id: str = "default", transcription_path: str = "transcription.txt",
+                video_ids: Optional[List[str]] = None):
+       """
+       Q&A over one video's transcript, or over `video_ids` when several videos
+       should be searched together. Only `video_id` is indexed from
+       `transcription_path` on demand; the others must already be indexed.
+       """
+       self.video_id = video_id
+       self.transcription_path = transcription_path
+       self.video_ids = list(video_ids) if video_ids else [video_id]
+       if video_id not in self.video_ids:
+           self.video_ids.insert(0, video_id)
+
+       self.api_key = API_KEY
 
 
        # Initialize components with error handling
        try:
-           self.llm = ChatOpenAI(
-               temperature=0.3,
-               openai_api_key=self.api_key,
-               model="gpt-3.5-turbo-16k",  # Using 16k context for longer videos
-               max_tokens=2000
-           )
+           self.llm = create_llm(self.api_key)
           
-           self.embeddings = OpenAIEmbeddings(
-               openai_api_key=self.api_key,
-               model="text-embedding-3-small"
-           )
+           self.embeddings = create_embeddings(self.api_key)
           
            self.text_splitter = RecursiveCharacterTextSplitter(
                chunk_size=1500,
@@ -34,6 +214,14 @@ class VideoQAAgent:
                length_function=len
            )
           
+           self.db = ChromaDB()
+           self._stores = {}
+          
+           # Precomputed overview for single-video sessions, if ingestion built one from this transcript
+           fingerprint = transcript_fingerprint(transcription_path)
+           self.summary_tree = load_summary_tree(video_id, transcript=fingerprint) \
+               if len(self.video_ids) == 1 and fingerprint is not None else None
+          
            self._setup_qa_system()
           
        except Exception as e:
@@ -41,28 +229,74 @@ class VideoQAAgent:
            raise
 
 
+   def _store_for(self, video_id: str) -> Chroma:
+       name = self.db.shard_name(video_id)
+       if name not in self._stores:
+           self._stores[name] = video_store(self.db, video_id, self.embeddings)
+       return self._stores[name]
+
+
+   def is_indexed(self, video_id: str) -> bool:
+       existing = self._store_for(video_id).get(where={"video_id": video_id}, limit=1)
+       return bool(existing["ids"])
+
+
+   def _ensure_indexed(self):
+       """
+       Embed the primary video's transcript unless a complete index of this
+       exact transcript is already recorded; later sessions reuse the vectors.
+       """
+       progress = self.db.get_progress(self.video_id)
+       fingerprint = transcript_fingerprint(self.transcription_path)
+       if progress is not None and not progress["complete"] and \
+               (fingerprint is None or progress.get("transcript") != fingerprint):
+           # Incremental indexing is under way; answer from what is there so far
+           if self.is_indexed(self.video_id):
+               return
+           raise RuntimeError("Transcription has started but nothing is indexed yet, please try again shortly")
+      
+       # Load and process the transcription file
+       if fingerprint is None:
+           if progress is not None:
+               return
+           raise FileNotFoundError(f"{self.transcription_path} not found")
+       if progress is not None and progress["complete"] and progress.get("transcript") == fingerprint:
+           return
+      
+       loader = TextLoader(self.transcription_path)
+       documents = loader.load()
+      
+       if len(documents) == 0:
+           raise ValueError("Empty transcription file")
+      
+       # Drop vectors from a partial or outdated index before rebuilding
+       self.db.delete_vectors(self.video_id)
+       self._stores.pop(self.db.shard_name(self.video_id), None)
+      
+       # Split text into manageable chunks tagged with their video
+       texts = self.text_splitter.split_documents(documents)
+       for text in texts:
+           text.metadata["video_id"] = self.video_id
+      
+       self._store_for(self.video_id).add_documents(
+           texts,
+           ids=[f"{self.video_id}_{idx}" for idx in range(len(texts))]
+       )
+      
+       # Only a fully written index is recorded as complete
+       ends = re.findall(r"^\[[\d.]+-([\d.]+)\]", documents[0].page_content, re.MULTILINE)
+       indexed_until = float(ends[-1]) if ends else 0.0
+       self.db.set_progress(self.video_id, indexed_until, complete=True, transcript=fingerprint)
+
+
+   def _build_retriever(self):
+       return video_retriever(self.db, self.video_ids, self._store_for, self.embeddings, k=4)
+
+
    def _setup_qa_system(self):
        """Initialize the QA system with proper error handling"""
        try:
-           # Load and process the transcription file
-           if not os.path.exists("transcription.txt"):
-               raise FileNotFoundError("transcription.txt not found")
-          
-           loader = TextLoader("transcription.txt")
-           documents = loader.load()
-          
-           if len(documents) == 0:
-               raise ValueError("Empty transcription file")
-          
-           # Split text into manageable chunks
-           texts = self.text_splitter.split_documents(documents)
-          
-           # Create vector store
-           self.vector_store = Chroma.from_documents(
-               documents=texts,
-               embedding=self.embeddings,
-               persist_directory="./chroma_db"
-           )
+           self._ensure_indexed()
           
            # Create optimized prompt template
            template = """
@@ -85,7 +319,7 @@ class VideoQAAgent:
            self.qa_chain = RetrievalQA.from_chain_type(
                llm=self.llm,
                chain_type="stuff",
-               retriever=self.vector_store.as_retriever(search_kwargs={"k": 4}),
+               retriever=self._build_retriever(),
                chain_type_kwargs={"prompt": QA_PROMPT},
                return_source_documents=True
            )
@@ -95,6 +329,22 @@ class VideoQAAgent:
            raise
 
 
+   def coverage_note(self) -> str:
+       """Notice for answers drawn from a video that is still being transcribed"""
+       notes = []
+       for video_id in self.video_ids:
+           progress = self.db.get_progress(video_id)
+           if progress is not None and not progress["complete"]:
+               seconds = progress["indexed_until"]
+               minutes = math.floor(seconds / 60)
+               covered = f"{minutes} minute{'s' if minutes != 1 else ''}" if minutes else f"{math.floor(seconds)} seconds"
+               notes.append(
+                   f"⏳ Transcription still in progress: this answer only covers the first {covered}"
+                   + (f" of {video_id}." if len(self.video_ids) > 1 else " of the video.")
+               )
+       return "\n".join(notes)
+
+
    def ask_question(self, question: str) -> str:
        """Handle Q&A with proper error handling"""
        try:
@@ -105,6 +355,10 @@ class VideoQAAgent:
            if len(question) > 500:
                return "Question too long (max 500 characters)"
           
+           # Overview questions are answered from the whole-video summary tree
+           if self.summary_tree is not None and is_summary_question(question):
+               return format_summary_answer(self.summary_tree)
+          
            # Process the question
            result = self.qa_chain.invoke({"query": question})
            answer = result.get("result", "No answer found")
@@ -120,16 +374,27 @@ class VideoQAAgent:
                if timestamps:
                    answer += f"\n\n(References: {', '.join(timestamps)})"
           
+           # Flag answers from a partial index
+           note = self.coverage_note()
+           if note:
+               answer += f"\n\n{note}"
+          
            return answer
           
        except Exception as e:
            return f"⚠️ Error processing question: {str(e)}"
 
 
+   def delete_video(self, video_id: str):
+       """Drop a video from the index"""
+       self.db.delete_video(video_id)
+       self._stores.pop(self.db.shard_name(video_id), None)
+
+
    def cleanup(self):
        """Clean up resources"""
        try:
-           if hasattr(self, 'vector_store'):
-               self.vector_store.delete_collection()
+           for video_id in self.video_ids:
+               self.delete_video(video_id)
        except Exception as e:
            print(f"Cleanup error: {str(e)}")
\ No newline at end of file
@@ -1,12 +1,71 @@
 import os
 import wave
+import subprocess
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from pathlib import Path
 
 
 
 
+DECODE_SAMPLE_RATE = 16000
+
+
+
+
+def decode_audio(audio_path: str, sample_rate: int = DECODE_SAMPLE_RATE) -> np.ndarray:
+   """
+   Decode a compressed file (opus/webm/m4a/...) to mono int16 PCM in memory.
+   The download is kept in its original codec; no full WAV is written to disk.
+   """
+   command = [
+       "ffmpeg", "-nostdin", "-loglevel", "error",
+       "-i", audio_path,
+       "-f", "s16le", "-ac", "1", "-ar", str(sample_rate),
+       "-"
+   ]
+   try:
+       result = subprocess.run(command, capture_output=True, check=True)
+   except FileNotFoundError:
+       raise Exception("ffmpeg is required to decode compressed audio")
+   except subprocess.CalledProcessError as e:
+       raise Exception(f"ffmpeg failed: {e.stderr.decode(errors='ignore').strip()}")
+   return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+
+
+def load_audio(audio_path: str) -> Tuple[tuple, np.ndarray]:
+   """Return (wave params, int16 samples), decoding non-WAV input on demand"""
+   if Path(audio_path).suffix.lower() != ".wav":
+       audio_data = decode_audio(audio_path)
+       params = (1, 2, DECODE_SAMPLE_RATE, len(audio_data), "NONE", "not compressed")
+       return params, audio_data
+   try:
+       with wave.open(audio_path, 'rb') as wav_file:
+           params = wav_file.getparams()
+           frames = wav_file.readframes(params.nframes)
+           return tuple(params), np.frombuffer(frames, dtype=np.int16)
+   except Exception as e:
+       raise Exception(f"Failed to read WAV file: {str(e)}")
+
+
+
+
+def read_chunk_samples(chunk_path: str) -> Tuple[np.ndarray, int]:
+   """Mono float32 samples in [-1, 1] and the sample rate of a chunk WAV"""
+   with wave.open(chunk_path, 'rb') as wav_file:
+       channels = wav_file.getnchannels()
+       sample_rate = wav_file.getframerate()
+       frames = wav_file.readframes(wav_file.getnframes())
+   audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+   if channels > 1:
+       audio = audio.reshape(-1, channels).mean(axis=1)
+   return audio, sample_rate
+
+
+
+
 def chunk_audio(
    audio_path: str,
    chunk_duration: float = 30.0,
@@ -18,16 +77,9 @@ def chunk_audio(
    Returns list of dictionaries with path, start, end.
    """
    Path(output_dir).mkdir(exist_ok=True)
-   try:
-       with wave.open(audio_path, 'rb') as wav_file:
-           params = wav_file.getparams()
-           # Keep original quality but reduce chunk size
-           frames = wav_file.readframes(params.nframes)
-           audio_data = np.frombuffer(frames, dtype=np.int16)
-   except Exception as e:
-       raise Exception(f"Failed to read WAV file: {str(e)}")
+   params, audio_data = load_audio(audio_path)
   
-   sample_rate = params.framerate
+   sample_rate = params[2]
    samples_per_chunk = int(chunk_duration * sample_rate)
    samples_overlap = int(overlap * sample_rate)
    chunks = []
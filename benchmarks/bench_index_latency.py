@@ -0,0 +1,96 @@
+"""
+Query latency of the transcript index as total indexed hours grow.
+
+Fills a throwaway Chroma store with synthetic one-hour videos (random
+embeddings, one document per transcript segment) through the same LangChain
+stores the app writes to, and times the retriever VideoQAAgent builds for
+each sharding layout. Run with:
+
+    python benchmarks/bench_index_latency.py --hours 1 5 10 25 --queries 50
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from langchain_community.embeddings import FakeEmbeddings
+
+# Add the repository root to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chroma_db import ChromaDB
+from agent_vector_store import video_store, video_retriever
+
+
+def add_synthetic_video(store, video_id: str, segments: int):
+    store.add_texts(
+        [f"[{idx * 10.0:.2f}-{idx * 10.0 + 10.0:.2f}] segment {idx}" for idx in range(segments)],
+        metadatas=[{"video_id": video_id, "start": idx * 10.0, "end": idx * 10.0 + 10.0} for idx in range(segments)],
+        ids=[f"{video_id}_{idx}" for idx in range(segments)]
+    )
+
+
+def bench_layout(sharding: str, hours_steps, segments_per_hour: int, dim: int, queries: int,
+                 videos_per_query: int, seed: int):
+    rng = np.random.default_rng(seed)
+    np.random.seed(seed)  # FakeEmbeddings draws from the global generator
+    embeddings = FakeEmbeddings(size=dim)
+    path = tempfile.mkdtemp(prefix=f"chroma_bench_{sharding}_")
+    rows = []
+    try:
+        db = ChromaDB(path=path, sharding=sharding, progress_dir=os.path.join(path, "progress"))
+        stores = {}
+
+        def store_for(video_id):
+            # One LangChain store per shard, as VideoQAAgent caches them
+            name = db.shard_name(video_id)
+            if name not in stores:
+                stores[name] = video_store(db, video_id, embeddings)
+            return stores[name]
+
+        indexed = 0
+        for hours in hours_steps:
+            while indexed < hours:
+                video_id = f"video{indexed:04d}"
+                add_synthetic_video(store_for(video_id), video_id, segments_per_hour)
+                indexed += 1
+
+            latencies = []
+            for query in range(queries):
+                targets = [f"video{idx:04d}" for idx in
+                           rng.choice(indexed, size=min(videos_per_query, indexed), replace=False)]
+                retriever = video_retriever(db, targets, store_for, embeddings, k=4)
+                start = time.perf_counter()
+                retriever.invoke(f"question {query}")
+                latencies.append((time.perf_counter() - start) * 1000)
+            rows.append((sharding, hours, np.median(latencies), np.percentile(latencies, 95)))
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=int, nargs="+", default=[1, 5, 10, 25])
+    parser.add_argument("--segments-per-hour", type=int, default=360)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--videos-per-query", type=int, default=1,
+                        help="videos searched together per question (more than one uses MultiVideoRetriever)")
+    parser.add_argument("--layouts", nargs="+", default=["none", "hash", "video"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'layout':<8} {'hours':>6} {'p50 ms':>9} {'p95 ms':>9}")
+    for sharding in args.layouts:
+        for layout, hours, p50, p95 in bench_layout(
+            sharding, sorted(args.hours), args.segments_per_hour, args.dim, args.queries,
+            args.videos_per_query, args.seed
+        ):
+            print(f"{layout:<8} {hours:>6} {p50:>9.2f} {p95:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import os
+import json
+import hashlib
 from dotenv import load_dotenv
-from typing import List, Dict
+from typing import List, Dict, Optional
 import numpy as np
 import chromadb
 
@@ -13,39 +15,108 @@ load_dotenv()
 
 
 class ChromaDB:
-   def __init__(self):
+   """
+   Transcript vectors tagged with their video ID and routed to shard collections.
+
+   CHROMA_SHARDING selects the layout:
+   - "video": one collection per video (deleting a video drops its collection)
+   - "hash":  CHROMA_NUM_SHARDS collections, videos assigned by hash of their ID
+   - "none":  everything in the single CHROMA_COLLECTION_NAME collection
+   Queries are always filtered on video_id, so passages never leak across videos.
+   Per-video indexing progress is kept in `progress_dir` while a video is still
+   being transcribed and indexed chunk by chunk.
+   """
+   def __init__(self, path: str = "./chroma_db", sharding: Optional[str] = None, num_shards: Optional[int] = None,
+                progress_dir: str = "index_progress"):
        # Initialize with new simplified client
-       self.client = chromadb.PersistentClient(path="./chroma_db")
+       self.path = path
+       self.progress_dir = progress_dir
+       self.client = chromadb.PersistentClient(path=path)
        self.collection_name = os.getenv("CHROMA_COLLECTION_NAME", "youtube-qa")
-       self._setup_collection()
+       self.sharding = sharding or os.getenv("CHROMA_SHARDING", "video")
+       self.num_shards = num_shards or int(os.getenv("CHROMA_NUM_SHARDS", "16"))
+       if self.sharding not in ("video", "hash", "none"):
+           raise ValueError(f"Unknown CHROMA_SHARDING mode: {self.sharding}")
+       self._collections = {}
 
 
 
 
-   def _setup_collection(self):
-       # Create or get the collection
-       self.collection = self.client.get_or_create_collection(
-           name=self.collection_name,
-           metadata={"hnsw:space": "cosine"}  # Using cosine similarity
-       )
+   def shard_name(self, video_id: str) -> str:
+       """Collection holding a video's vectors (hashed so names stay valid for Chroma)"""
+       if self.sharding == "none":
+           return self.collection_name
+       digest = hashlib.sha1(video_id.encode("utf-8")).hexdigest()
+       if self.sharding == "hash":
+           return f"{self.collection_name}-s{int(digest, 16) % self.num_shards:03d}"
+       return f"{self.collection_name}-v{digest[:16]}"
+
+
+
+
+   def _get_collection(self, name: str):
+       if name not in self._collections:
+           self._collections[name] = self.client.get_or_create_collection(
+               name=name,
+               metadata={"hnsw:space": "cosine"}  # Using cosine similarity
+           )
+       return self._collections[name]
+
+
+
+
+   def _existing_collection(self, name: str):
+       """Collection for read paths: None instead of creating an empty one"""
+       if name not in self._collections:
+           try:
+               self._collections[name] = self.client.get_collection(name=name)
+           except Exception:
+               # Chroma raises ValueError/NotFoundError depending on version
+               return None
+       return self._collections[name]
+
+
+
+
+   def collection_for(self, video_id: str):
+       return self._get_collection(self.shard_name(video_id))
 
 
 
 
-   def store_transcriptions(self, transcriptions: List[Dict], embeddings: List[np.ndarray]):
-       # Prepare data for ChromaDB
-       ids = [f"vec_{idx}" for idx in range(len(transcriptions))]
+   def _all_shards(self) -> List[str]:
+       names = [c.name for c in self.client.list_collections()]
+       if self.sharding == "none":
+           return [n for n in names if n == self.collection_name]
+       return [n for n in names if n.startswith(f"{self.collection_name}-")]
+
+
+
+
+   @staticmethod
+   def video_filter(video_ids: List[str]) -> Dict:
+       if len(video_ids) == 1:
+           return {"video_id": video_ids[0]}
+       return {"video_id": {"$in": list(video_ids)}}
+
+
+
+
+   def store_transcriptions(self, transcriptions: List[Dict], embeddings: List[np.ndarray], video_id: str = "default"):
+       # Prepare data for ChromaDB; IDs are per video so re-ingestion overwrites instead of duplicating
+       ids = [f"{video_id}_{idx}" for idx in range(len(transcriptions))]
        embeddings_list = [emb.tolist() for emb in embeddings]
        metadatas = [{
+           "video_id": video_id,
            "text": data["text"],
            "start": data["start"],
            "end": data["end"],
            "path": data.get("path", ""),
            "language": data.get("language", "en")
        } for data in transcriptions]
-      
-       # Add to collection
-       self.collection.add(
+
+       # Add to the video's shard
+       self.collection_for(video_id).upsert(
            ids=ids,
            embeddings=embeddings_list,
            metadatas=metadatas
@@ -54,24 +125,101 @@ class ChromaDB:
 
 
 
-   def search(self, query_embedding: np.ndarray, top_k: int = 3):
+   def search(self, query_embedding: np.ndarray, top_k: int = 3, video_ids: Optional[List[str]] = None):
        # Convert numpy array to list
        query_embedding_list = query_embedding.tolist()
-      
-       # Query the collection
-       results = self.collection.query(
-           query_embeddings=[query_embedding_list],
-           n_results=top_k,
-           include=["metadatas", "distances"]
-       )
-      
-       # Format results
+
+       # Route to the shards holding the requested videos (or every shard)
+       if video_ids:
+           routes = {}
+           for video_id in video_ids:
+               routes.setdefault(self.shard_name(video_id), []).append(video_id)
+           targets = [(name, self.video_filter(ids)) for name, ids in routes.items()]
+       else:
+           targets = [(name, None) for name in self._all_shards()]
+
+       # Query each shard and merge by score; shards that were never written have no matches
        matches = []
-       for i in range(top_k):
-           if i < len(results["metadatas"][0]):
+       for name, where in targets:
+           collection = self._existing_collection(name)
+           if collection is None:
+               continue
+           results = collection.query(
+               query_embeddings=[query_embedding_list],
+               n_results=top_k,
+               where=where,
+               include=["metadatas", "distances"]
+           )
+           for metadata, distance in zip(results["metadatas"][0], results["distances"][0]):
                matches.append({
-                   "metadata": results["metadatas"][0][i],
-                   "score": 1 - results["distances"][0][i]
+                   "metadata": metadata,
+                   "score": 1 - distance
                })
-      
-       return {"matches": matches}
\ No newline at end of file
+
+       matches.sort(key=lambda match: match["score"], reverse=True)
+       return {"matches": matches[:top_k]}
+
+
+
+
+   def _progress_path(self, video_id: str) -> str:
+       return os.path.join(self.progress_dir, f"{video_id}.json")
+
+
+
+
+   def set_progress(self, video_id: str, indexed_until: float, complete: bool, transcript: Optional[str] = None):
+       """
+       Record how far into the video the index reaches. A complete record also
+       carries the fingerprint of the transcript it was built from.
+       """
+       os.makedirs(self.progress_dir, exist_ok=True)
+       path = self._progress_path(video_id)
+       tmp_path = f"{path}.tmp"
+       with open(tmp_path, 'w', encoding='utf-8') as f:
+           json.dump({"indexed_until": indexed_until, "complete": complete, "transcript": transcript}, f)
+       os.replace(tmp_path, path)
+
+
+
+
+   def get_progress(self, video_id: str) -> Optional[Dict]:
+       """{"indexed_until": seconds, "complete": bool, "transcript": fingerprint}, or None if never indexed"""
+       path = self._progress_path(video_id)
+       if not os.path.exists(path):
+           return None
+       with open(path, 'r', encoding='utf-8') as f:
+           return json.load(f)
+
+
+
+
+   def clear_progress(self, video_id: str):
+       if os.path.exists(self._progress_path(video_id)):
+           os.remove(self._progress_path(video_id))
+
+
+
+
+   def delete_vectors(self, video_id: str):
+       """Remove every vector of a video; per-video shards are dropped outright"""
+       name = self.shard_name(video_id)
+       if self.sharding == "video":
+           self._collections.pop(name, None)
+           if name in self._all_shards():
+               self.client.delete_collection(name)
+       else:
+           collection = self._existing_collection(name)
+           if collection is not None:
+               collection.delete(where={"video_id": video_id})
+
+
+
+
+   def delete_video(self, video_id: str):
+       """
+       Remove a video from the index (vectors and progress record).
+       main.delete_video also removes its transcript, checkpoint, summary and audio.
+       """
+       self.delete_vectors(video_id)
+       self.clear_progress(video_id)
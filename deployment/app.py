@@ -23,9 +23,9 @@ def process_video(video_url):
        return "Transcription failed. Please check the video link or try again."
 
 
-def answer_question(question):
-   # Call the Q&A session to get the answer
-   answer = start_qa_session(question)
+def answer_question(question, video_url):
+   # Call the Q&A session for the video in the URL box
+   answer = start_qa_session(question, video_url)
    return answer
 
 
@@ -53,7 +53,7 @@ with gr.Blocks() as app:
   
    # Define button actions for submitting the question
    submit_button = gr.Button("Send Question")
-   submit_button.click(answer_question, inputs=[question_input], outputs=[answer_output])
+   submit_button.click(answer_question, inputs=[question_input, video_url_input], outputs=[answer_output])
 
 
 # Launch the Gradio app
@@ -1,23 +1,25 @@
 #!/usr/bin/env python3
 """
 YouTube Video Transcription and Q&A System v2.0
-- Enhanced downloader with cookie support
+- Enhanced downloader with cookie support, backoff and probe cache
 - Local Whisper transcription
-- Interactive Q&A
+- Interactive Q&A, available while transcription is still running
 - LangSmith integration
 """
 
 
 import os
 import time
-import random
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from dotenv import load_dotenv
-from agent_vector_store import VideoQAAgent
+from agent_vector_store import VideoQAAgent, IncrementalIndexer, create_llm, transcript_fingerprint
+from chroma_db import ChromaDB
 from whisper_transcriber import WhisperTranscriber
 from audio_processor import chunk_audio
-import yt_dlp
+from youtube_downloader import download_youtube_audio, video_id_for, get_downloader
+from transcription_checkpoint import TranscriptionCheckpoint
+from video_summarizer import build_summary_tree, save_summary_tree, load_summary_tree, summary_path, LLMSummarizer
 
 
 
@@ -37,114 +39,15 @@ os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
 
 
 
-class YouTubeDownloader:
-  """Enhanced YouTube audio downloader with cookie support and fallbacks"""
-  def __init__(self):
-      self.user_agents = [
-          'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
-          'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)',
-          'Mozilla/5.0 (X11; Linux x86_64)',
-          'Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X)'
-      ]
-      self.referers = [
-          'https://www.google.com/',
-          'https://www.facebook.com/',
-          'https://www.reddit.com/',
-          'https://www.twitter.com/'
-      ]
+TRANSCRIPTION_DIR = "transcriptions"
+_qa_agents: Dict[str, VideoQAAgent] = {}
 
 
 
 
-  def get_cookies(self):
-      """Extract browser cookies for YouTube"""
-      try:
-          import browser_cookie3
-          return browser_cookie3.load(domain_name='youtube.com')
-      except Exception as e:
-          print(f"⚠️ Couldn't load browser cookies: {str(e)}")
-          return None
-
-
-
-
-  def get_ydl_options(self):
-      """Generate download options with randomized headers"""
-      return {
-          'format': 'bestaudio/best',
-          'postprocessors': [{
-              'key': 'FFmpegExtractAudio',
-              'preferredcodec': 'wav',
-              'preferredquality': '5',
-          }],
-          'outtmpl': 'audio_downloads/%(title)s.%(ext)s',
-          'quiet': False,
-          'no_warnings': False,
-          'retries': 10,
-          'fragment_retries': 10,
-          'extractor_retries': 3,
-          'http_headers': {
-              'User-Agent': random.choice(self.user_agents),
-              'Referer': random.choice(self.referers),
-              'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-              'Accept-Language': 'en-US,en;q=0.5',
-              'Accept-Encoding': 'gzip, deflate',
-          },
-          'socket_timeout': 30,
-          'extract_flat': True,
-          'force_generic_extractor': True,
-          'noplaylist': True,
-          'cookiefile': self.get_cookies(),
-          'verbose': True
-      }
-
-
-
-
-  def download_with_ytdlp(self, video_url: str) -> Tuple[str, str]:
-      """Primary download method with yt-dlp"""
-      try:
-          with yt_dlp.YoutubeDL(self.get_ydl_options()) as ydl:
-              info = ydl.extract_info(video_url, download=True)
-              file_path = ydl.prepare_filename(info).replace('.webm', '.wav').replace('.m4a', '.wav')
-              return file_path, info.get('title', 'untitled')
-      except Exception as e:
-          raise Exception(f"yt-dlp failed: {str(e)}")
-
-
-
-
-  def download_with_pytube(self, video_url: str) -> Tuple[str, str]:
-      """Fallback method using pytube"""
-      try:
-          from pytube import YouTube
-          yt = YouTube(video_url,
-                      use_oauth=True,
-                      allow_oauth_cache=True)
-          stream = yt.streams.filter(only_audio=True).first()
-          output_path = stream.download(output_path='audio_downloads')
-          return output_path, yt.title
-      except Exception as e:
-          raise Exception(f"pytube failed: {str(e)}")
-
-
-
-
-def download_youtube_audio(video_url: str) -> Tuple[str, str]:
-  """Main download function with multiple fallbacks"""
-  downloader = YouTubeDownloader()
-  methods = [
-      downloader.download_with_ytdlp,
-      downloader.download_with_pytube
-  ]
-  for attempt in range(3):  # FIXED indentation here
-      for method in methods:
-          try:
-              return method(video_url)
-          except Exception as e:
-              print(f"Attempt {attempt + 1} with {method.__name__} failed: {str(e)}")
-              time.sleep(random.randint(2, 5))
-  raise Exception("All download methods failed after 3 attempts each")
+def transcription_path(video_id: str) -> str:
+  """Per-video transcript file, so several videos can be indexed side by side"""
+  return os.path.join(TRANSCRIPTION_DIR, f"{video_id}.txt")
 
 
 
@@ -163,26 +66,64 @@ def save_transcription(transcriptions: List[Dict], filename: str = "transcriptio
 
 
 
-def transcribe_audio(url: str) -> bool:
+def build_summaries(video_id: str, transcriptions: List[Dict]):
+  """Optional ingestion stage: map-reduce summary tree stored alongside the video"""
+  try:
+      # Repeat submissions of an unchanged transcript keep the existing tree
+      fingerprint = transcript_fingerprint(transcription_path(video_id))
+      if fingerprint is not None and load_summary_tree(video_id, transcript=fingerprint) is not None:
+          print(f"✓ Summary tree for {video_id} is up to date")
+          return
+      if os.getenv("SUMMARY_LLM", "local").lower() == "openai":
+          summarize = LLMSummarizer(create_llm())
+      else:
+          summarize = None  # local extractive stand-in
+      tree = build_summary_tree(transcriptions, summarize=summarize, transcript=fingerprint)
+      path = save_summary_tree(video_id, tree)
+      print(f"✓ Summary tree ({len(tree['levels'][0])} sections) saved to {path}")
+  except Exception as e:
+      # Q&A still works without the tree, through normal retrieval
+      print(f"⚠️ Failed to build summaries: {str(e)}")
+
+
+
+
+def start_incremental_index(video_id: str) -> Optional[IncrementalIndexer]:
+  """Index chunks as they are transcribed so Q&A can start early (INCREMENTAL_INDEX=false disables)"""
+  if os.getenv("INCREMENTAL_INDEX", "true").lower() != "true":
+      return None
+  try:
+      return IncrementalIndexer(video_id, batch_chunks=int(os.getenv("INCREMENTAL_INDEX_BATCH", "1")))
+  except Exception as e:
+      # Fall back to indexing the finished transcript on the first question
+      print(f"⚠️ Incremental indexing unavailable: {str(e)}")
+      return None
+
+
+
+
+def transcribe_audio(url: str, summarize: Optional[bool] = None) -> bool:
   """Complete audio transcription pipeline"""
+  if summarize is None:
+      summarize = os.getenv("PRECOMPUTE_SUMMARIES", "false").lower() == "true"
+  indexer = None
   try:
       # Create necessary directories
       os.makedirs("audio_downloads", exist_ok=True)
       os.makedirs("audio_chunks", exist_ok=True)
+      os.makedirs(TRANSCRIPTION_DIR, exist_ok=True)
 
 
 
 
-      # Download audio with multiple fallbacks
-      audio_path = "audio_downloads/audio.wav"
-      if not os.path.exists(audio_path):
-          print("\n🔍 Attempting to download YouTube audio...")
-          try:
-              audio_path, video_title = download_youtube_audio(url)
-              print(f"✓ Downloaded: {video_title}")
-          except Exception as e:
-              print(f"\n❌ All download methods failed: {str(e)}")
-              return False
+      # Download audio with multiple fallbacks (repeat submissions reuse the cached file)
+      print("\n🔍 Attempting to download YouTube audio...")
+      try:
+          audio_path, video_title = download_youtube_audio(url)
+          print(f"✓ Downloaded: {video_title}")
+      except Exception as e:
+          print(f"\n❌ All download methods failed: {str(e)}")
+          return False
 
 
 
@@ -195,24 +136,53 @@ def transcribe_audio(url: str) -> bool:
 
 
 
-      # Initialize Whisper
-      print("\n🔊 Initializing Whisper transcription...")
-      whisper = WhisperTranscriber()
+      # Resume from any chunks finished by an earlier, interrupted run
+      video_id = video_id_for(url)
+      checkpoint = TranscriptionCheckpoint(video_id)
+      pending = [chunk for chunk in chunks if not checkpoint.is_done(chunk)]
+      if len(pending) < len(chunks):
+          print(f"♻️ Resuming: {len(chunks) - len(pending)} chunks already transcribed")
+
+
+
+
+      indexer = start_incremental_index(video_id)
+      on_chunk = indexer.add_chunk if indexer is not None else None
 
 
 
 
-      # Transcribe chunks
-      print("\n🔄 Starting transcription (this may take several minutes)...")
       start_time = time.time()
-      transcriptions = whisper.transcribe_chunks(chunks)
-      transcribe_time = time.time() - start_time
+      if pending:
+          # Initialize Whisper
+          print("\n🔊 Initializing Whisper transcription...")
+          whisper = WhisperTranscriber()
+
+
+
+
+          # Transcribe chunks
+          print("\n🔄 Starting transcription (this may take several minutes)...")
+          transcriptions = whisper.transcribe_chunks(chunks, checkpoint=checkpoint, on_chunk=on_chunk)
+      else:
+          transcriptions = checkpoint.merge(chunks)
+          if on_chunk is not None:
+              for chunk in chunks:
+                  on_chunk(chunk, checkpoint.segments_for(chunk))
+      transcribe_time = max(time.time() - start_time, 1e-6)
 
 
 
 
       # Save results
-      save_transcription(transcriptions)
+      save_transcription(transcriptions, transcription_path(video_id))
+      if indexer is not None:
+          indexer.finish(transcription_path(video_id))
+      if summarize:
+          print("\n📝 Building section summaries...")
+          build_summaries(video_id, transcriptions)
+      # Drop any cached agent so the next question sees the new transcript and summaries
+      _qa_agents.pop(video_id, None)
 
 
 
@@ -233,16 +203,48 @@ def transcribe_audio(url: str) -> bool:
 
   except Exception as e:
       print(f"\n❌ Transcription failed: {str(e)}")
+      if indexer is not None:
+          indexer.abort()
       return False
 
 
 
 
-def start_qa_session(question: str = ""):
+def get_qa_agent(video_url: str = "") -> VideoQAAgent:
+  """Q&A agent for a video, reused across questions (the legacy transcription.txt without a URL)"""
+  if video_url:
+      video_id = video_id_for(video_url)
+      path = transcription_path(video_id)
+  else:
+      video_id, path = "default", "transcription.txt"
+  if video_id not in _qa_agents:
+      _qa_agents[video_id] = VideoQAAgent(video_id=video_id, transcription_path=path)
+  return _qa_agents[video_id]
+
+
+
+
+def delete_video(video_url: str):
+  """Remove a video everywhere: vectors, progress, transcript, checkpoint, summary and audio"""
+  video_id = video_id_for(video_url)
+  _qa_agents.pop(video_id, None)
+  ChromaDB().delete_video(video_id)
+  TranscriptionCheckpoint(video_id).clear()
+  for path in [transcription_path(video_id), summary_path(video_id)] + \
+          [str(p) for p in Path("audio_chunks").glob(f"{video_id}_chunk_*.wav")]:
+      if os.path.exists(path):
+          os.remove(path)
+  get_downloader().probe_cache.forget(video_id)
+  print(f"✓ Deleted video {video_id}")
+
+
+
+
+def start_qa_session(question: str = "", video_url: str = ""):
   """Interactive Q&A session about the video content"""
   try:
       print("\n🔍 Loading Q&A system...")
-      qa_agent = VideoQAAgent()
+      qa_agent = get_qa_agent(video_url)
     
       print("\n💬 Q&A Session Started")
       print("---------------------")
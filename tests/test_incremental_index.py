@@ -0,0 +1,190 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain")
+pytest.importorskip("langchain_community")
+pytest.importorskip("langchain_openai")
+
+# Add the repository root to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import agent_vector_store
+from agent_vector_store import IncrementalIndexer, VideoQAAgent, transcript_fingerprint
+
+
+VIDEO_ID = "abc123def45"
+# 30 s chunks with 5 s overlap, as main.transcribe_audio cuts them
+CHUNKS = [{"start": start, "end": start + 30.0, "path": f"chunk_{start:.0f}.wav"} for start in (0.0, 25.0, 50.0, 75.0)]
+
+
+def _segments(chunk):
+    return [{"text": f"said at {chunk['start']:.0f}", "start": chunk['start'], "end": chunk['end']}]
+
+
+class FakeStore:
+    """The parts of LangChain's Chroma that indexing touches"""
+    def __init__(self):
+        self.documents = {}
+        self.added = []
+        self.failures = 0
+
+    def get(self, where=None, limit=None, include=None):
+        ids = [id_ for id_, doc in self.documents.items() if doc.metadata.get("video_id") == where["video_id"]]
+        return {"ids": ids[:limit] if limit else ids}
+
+    def add_documents(self, documents, ids):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("rate limited")
+        self.added.extend(ids)
+        self.documents.update(zip(ids, documents))
+
+
+class FakeDB:
+    """ChromaDB with progress records in memory and one store per video"""
+    def __init__(self):
+        self.progress = {}
+        self.stores = {}
+
+    def shard_name(self, video_id):
+        return f"shard-{video_id}"
+
+    def set_progress(self, video_id, indexed_until, complete, transcript=None):
+        self.progress[video_id] = {"indexed_until": indexed_until, "complete": complete, "transcript": transcript}
+
+    def get_progress(self, video_id):
+        return self.progress.get(video_id)
+
+    def clear_progress(self, video_id):
+        self.progress.pop(video_id, None)
+
+    def delete_vectors(self, video_id):
+        self.stores.pop(video_id, None)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(agent_vector_store, "video_store",
+                        lambda db_, video_id, embeddings: db_.stores.setdefault(video_id, FakeStore()))
+    return db
+
+
+@pytest.fixture
+def transcript(tmp_path):
+    path = tmp_path / f"{VIDEO_ID}.txt"
+    path.write_text("".join(f"[{c['start']:.2f}-{c['end']:.2f}] said at {c['start']:.0f}\n" for c in CHUNKS))
+    return str(path)
+
+
+def _indexer(db, sleeps=None, **kwargs):
+    return IncrementalIndexer(VIDEO_ID, db=db, embeddings=object(), sleep=(sleeps if sleeps is not None else []).append,
+                              **kwargs)
+
+
+def test_resume_fills_gaps_left_by_an_interrupted_run(db, transcript):
+    first = _indexer(db)
+    for idx in (0, 2, 3):
+        first.add_chunk(CHUNKS[idx], _segments(CHUNKS[idx]))
+    # Run 1 died here without indexing chunk 1, although later chunks are indexed
+    assert db.progress[VIDEO_ID] == {"indexed_until": 105.0, "complete": False, "transcript": None}
+
+    second = _indexer(db)
+    for chunk in CHUNKS:
+        second.add_chunk(chunk, _segments(chunk))
+    assert second.finish(transcript)
+
+    store = db.stores[VIDEO_ID]
+    assert store.added == [first.chunk_id(CHUNKS[idx]) for idx in (0, 2, 3, 1)]
+    assert db.progress[VIDEO_ID] == {"indexed_until": 105.0, "complete": True,
+                                     "transcript": transcript_fingerprint(transcript)}
+
+
+def test_complete_index_is_not_embedded_again(db, transcript):
+    first = _indexer(db)
+    for chunk in CHUNKS:
+        first.add_chunk(chunk, _segments(chunk))
+    first.finish(transcript)
+
+    second = _indexer(db)
+    assert second.skip
+    for chunk in CHUNKS:
+        second.add_chunk(chunk, _segments(chunk))
+    assert second.finish(transcript)
+    assert len(db.stores[VIDEO_ID].added) == len(CHUNKS)
+
+
+def test_finish_retries_a_failed_flush(db, transcript):
+    sleeps = []
+    indexer = _indexer(db, sleeps, batch_chunks=len(CHUNKS) + 1)
+    for chunk in CHUNKS:
+        indexer.add_chunk(chunk, _segments(chunk))
+    db.stores[VIDEO_ID].failures = 2
+
+    assert indexer.finish(transcript)
+    assert sleeps == [1, 2]
+    assert len(db.stores[VIDEO_ID].added) == len(CHUNKS)
+    assert db.progress[VIDEO_ID]["complete"]
+
+
+def test_finish_that_cannot_flush_leaves_the_transcript_for_a_rebuild(db, transcript):
+    sleeps = []
+    indexer = _indexer(db, sleeps)
+    indexer.add_chunk(CHUNKS[0], _segments(CHUNKS[0]))
+    db.stores[VIDEO_ID].failures = 10
+    for chunk in CHUNKS[1:]:
+        indexer.add_chunk(chunk, _segments(chunk))
+
+    assert not indexer.finish(transcript)
+    assert sleeps == [1, 2]
+    assert db.progress[VIDEO_ID] == {"indexed_until": 30.0, "complete": False,
+                                     "transcript": transcript_fingerprint(transcript)}
+
+    # The first question rebuilds the index from the finished transcript
+    db.stores[VIDEO_ID].failures = 0
+    agent = _agent(db, transcript)
+    agent._ensure_indexed()
+    assert db.progress[VIDEO_ID]["complete"]
+    assert db.progress[VIDEO_ID]["indexed_until"] == 105.0
+    assert agent.coverage_note() == ""
+
+
+def test_abort_clears_progress(db):
+    indexer = _indexer(db)
+    indexer.add_chunk(CHUNKS[0], _segments(CHUNKS[0]))
+    assert db.get_progress(VIDEO_ID) is not None
+    indexer.abort()
+    assert db.get_progress(VIDEO_ID) is None
+
+
+def _agent(db, transcription_path="missing.txt", video_ids=None):
+    # Skip the LLM and QA chain setup; only the indexing state is needed
+    agent = VideoQAAgent.__new__(VideoQAAgent)
+    agent.video_id = VIDEO_ID
+    agent.video_ids = video_ids or [VIDEO_ID]
+    agent.transcription_path = transcription_path
+    agent.embeddings = object()
+    agent.text_splitter = agent_vector_store.RecursiveCharacterTextSplitter(
+        chunk_size=1500, chunk_overlap=200, length_function=len
+    )
+    agent.db = db
+    agent._stores = {}
+    return agent
+
+
+@pytest.mark.parametrize("indexed_until, covered", [
+    (30.0, "first 30 seconds"),
+    (75.0, "first 1 minute"),
+    (150.0, "first 2 minutes"),
+])
+def test_coverage_note_reports_indexed_time(db, indexed_until, covered):
+    db.set_progress(VIDEO_ID, indexed_until, complete=False)
+    assert _agent(db).coverage_note() == f"⏳ Transcription still in progress: this answer only covers the {covered} of the video."
+
+
+def test_coverage_note_is_empty_for_complete_index(db):
+    db.set_progress(VIDEO_ID, 150.0, complete=True)
+    assert _agent(db).coverage_note() == ""
@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+
+# Add the repository root to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from transcription_checkpoint import TranscriptionCheckpoint
+from whisper_transcriber import WhisperTranscriber
+
+
+def _chunks(tmp_path, starts):
+    chunks = []
+    for start in starts:
+        path = tmp_path / f"chunk_{start:.0f}.wav"
+        path.write_bytes(b"")
+        chunks.append({"start": start, "end": start + 30.0, "path": str(path)})
+    return chunks
+
+
+def _segments(chunk):
+    return [{"text": f"at {chunk['start']:.0f}", "start": chunk['start'], "end": chunk['end'], "path": chunk['path']}]
+
+
+def test_torn_last_line_is_skipped_and_next_record_starts_fresh(tmp_path):
+    chunks = _chunks(tmp_path, [0.0, 25.0, 50.0])
+    checkpoint = TranscriptionCheckpoint("vid", directory=str(tmp_path))
+    checkpoint.record(chunks[0], _segments(chunks[0]))
+    # A crash in the middle of writing the second record
+    with open(checkpoint.path, 'a', encoding='utf-8') as f:
+        f.write('{"offset": 25000, "segm')
+
+    resumed = TranscriptionCheckpoint("vid", directory=str(tmp_path))
+    assert resumed.is_done(chunks[0]) and not resumed.is_done(chunks[1])
+    resumed.record(chunks[2], _segments(chunks[2]))
+
+    reloaded = TranscriptionCheckpoint("vid", directory=str(tmp_path))
+    assert reloaded.is_done(chunks[0]) and reloaded.is_done(chunks[2])
+    assert reloaded.segments_for(chunks[2]) == _segments(chunks[2])
+
+
+def test_merge_returns_chunks_in_offset_order(tmp_path):
+    chunks = _chunks(tmp_path, [0.0, 25.0, 50.0])
+    checkpoint = TranscriptionCheckpoint("vid", directory=str(tmp_path))
+    for chunk in (chunks[2], chunks[0], chunks[1]):
+        checkpoint.record(chunk, _segments(chunk))
+    assert [s["text"] for s in checkpoint.merge(list(reversed(chunks)))] == ["at 0", "at 25", "at 50"]
+
+
+def test_transcribe_chunks_only_runs_missing_chunks(tmp_path):
+    chunks = _chunks(tmp_path, [0.0, 25.0, 50.0, 75.0])
+    checkpoint = TranscriptionCheckpoint("vid", directory=str(tmp_path))
+    for chunk in (chunks[0], chunks[2]):
+        checkpoint.record(chunk, _segments(chunk))
+
+    calls = []
+
+    def pipe(path, return_timestamps):
+        calls.append(path)
+        return {"text": "new", "chunks": [{"text": "new", "timestamp": (0.0, 30.0)}]}
+
+    transcriber = WhisperTranscriber.__new__(WhisperTranscriber)
+    transcriber.client = None
+    transcriber.pipe = pipe
+    seen = []
+    results = transcriber.transcribe_chunks(chunks, checkpoint=checkpoint,
+                                            on_chunk=lambda chunk, segments: seen.append(chunk['start']))
+
+    assert calls == [chunks[1]['path'], chunks[3]['path']]
+    assert [s["text"] for s in results] == ["at 0", "new", "at 50", "new"]
+    assert sorted(seen) == [0.0, 25.0, 50.0, 75.0]
+    assert all(TranscriptionCheckpoint("vid", directory=str(tmp_path)).is_done(chunk) for chunk in chunks)
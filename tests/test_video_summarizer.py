@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+# Add the repository root to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from video_summarizer import build_summary_tree, is_summary_question, load_summary_tree, save_summary_tree
+
+
+@pytest.mark.parametrize("question", [
+    "Summarize the key points",
+    "List the main ideas",
+    "Give me an overview of the video",
+    "Can you summarize this video?",
+    "tl;dr",
+    "What are the key takeaways?",
+])
+def test_whole_video_overview_questions_use_the_tree(question):
+    assert is_summary_question(question)
+
+
+@pytest.mark.parametrize("question", [
+    "What are the key points about pricing?",
+    "Summarize what she says about the second experiment",
+    "Give an overview of the database section",
+    "What was said about GPUs?",
+])
+def test_topical_questions_go_to_retrieval(question):
+    assert not is_summary_question(question)
+
+
+def _recording_summarizer(calls):
+    def summarize(text, level):
+        calls.append((level, text))
+        return f"L{level}({text.count(chr(10)) + 1 if level else len(text.split())})"
+    return summarize
+
+
+def test_summary_tree_groups_windows_and_reduces_by_fan_in():
+    # Two segments in each of five 300 s windows
+    transcriptions = [{"text": f"segment {idx}", "start": idx * 150.0, "end": idx * 150.0 + 150.0}
+                      for idx in range(10)]
+    calls = []
+    tree = build_summary_tree(transcriptions, summarize=_recording_summarizer(calls), fan_in=2, transcript="abc")
+
+    assert [len(level) for level in tree["levels"]] == [5, 3, 2, 1]
+    assert [(node["start"], node["end"]) for node in tree["levels"][0]] == \
+        [(0.0, 300.0), (300.0, 600.0), (600.0, 900.0), (900.0, 1200.0), (1200.0, 1500.0)]
+    assert calls[0] == (0, "segment 0 segment 1")
+    assert [node["summary"] for node in tree["levels"][1]] == ["L1(2)", "L1(2)", "L1(1)"]
+    assert (tree["levels"][-1][0]["start"], tree["levels"][-1][0]["end"]) == (0.0, 1500.0)
+    assert tree["root"] == tree["levels"][-1][0]["summary"]
+    assert len(calls) == 5 + 3 + 2 + 1
+    assert tree["transcript"] == "abc"
+
+
+def test_empty_transcription_cannot_be_summarized():
+    with pytest.raises(ValueError):
+        build_summary_tree([])
+
+
+def test_tree_from_another_transcript_is_ignored(tmp_path):
+    tree = build_summary_tree([{"text": "Hello there.", "start": 0.0, "end": 5.0}], transcript="old")
+    save_summary_tree("vid", tree, directory=str(tmp_path))
+    assert load_summary_tree("vid", directory=str(tmp_path), transcript="old") == tree
+    assert load_summary_tree("vid", directory=str(tmp_path), transcript="new") is None
+    assert load_summary_tree("missing", directory=str(tmp_path)) is None
@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+# Add the repository root to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from whisper_server import BatchingInference, WhisperServerClient, make_server
+
+
+def _pipe(batches):
+    def pipe(inputs, batch_size, return_timestamps):
+        batches.append(len(inputs))
+        if any(len(item["raw"]) == 0 for item in inputs):
+            raise ValueError("empty audio")
+        return [{"text": f"{len(item['raw'])} samples", "chunks": []} for item in inputs]
+    return pipe
+
+
+def _submit_all(inference, lengths):
+    results = {}
+
+    def submit(length):
+        try:
+            results[length] = inference.submit(np.zeros(length, np.float32), 16000)["text"]
+        except Exception as e:
+            results[length] = e
+
+    threads = [threading.Thread(target=submit, args=(length,)) for length in lengths]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_requests_from_many_callers_share_a_batch():
+    batches = []
+    inference = BatchingInference(_pipe(batches), max_batch_size=4, max_wait_ms=200)
+    results = _submit_all(inference, [1, 2, 3, 4])
+    assert results == {n: f"{n} samples" for n in (1, 2, 3, 4)}
+    assert batches == [4]
+
+
+def test_failing_request_does_not_fail_its_batch():
+    batches = []
+    inference = BatchingInference(_pipe(batches), max_batch_size=4, max_wait_ms=200)
+    results = _submit_all(inference, [0, 2, 3, 4])
+    assert isinstance(results[0], ValueError)
+    assert [results[n] for n in (2, 3, 4)] == ["2 samples", "3 samples", "4 samples"]
+
+
+@pytest.mark.parametrize("scheme", ["unix", "http"])
+def test_client_round_trip(tmp_path, scheme):
+    inference = BatchingInference(_pipe([]), max_batch_size=2, max_wait_ms=10)
+    url = f"unix://{tmp_path}/whisper.sock" if scheme == "unix" else "http://127.0.0.1:0"
+    server = make_server(url, inference)
+    if scheme == "http":
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = WhisperServerClient(url)
+        assert client.transcribe(np.zeros(16000, np.float32), 16000)["text"] == "16000 samples"
+        with pytest.raises(RuntimeError, match="empty audio"):
+            client.transcribe(np.zeros(0, np.float32), 16000)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,145 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("yt_dlp")
+
+# Add the repository root to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from youtube_downloader import YouTubeDownloader
+
+
+AUDIO_BYTES = b"\x00\x00\x00\x18ftypM4A " + bytes(range(256)) * 16
+QUIET = {'quiet': True, 'verbose': False, 'no_warnings': True, 'retries': 0, 'extractor_retries': 0}
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """/clip.m4a serves audio, /missing* is a 404 (bad video), /broken* a 500 (extractor trouble)"""
+    def _respond(self, with_body: bool):
+        if self.path.startswith("/clip"):
+            self.server.hits.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mp4")
+            self.send_header("Content-Length", str(len(AUDIO_BYTES)))
+            self.end_headers()
+            if with_body:
+                self.wfile.write(AUDIO_BYTES)
+        else:
+            self.send_response(404 if self.path.startswith("/missing") else 500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def do_GET(self):
+        self._respond(with_body=True)
+
+    def do_HEAD(self):
+        self._respond(with_body=False)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    httpd.hits = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def _downloader(tmp_path, sleeps):
+    return YouTubeDownloader(
+        output_dir=str(tmp_path),
+        use_browser_cookies=False,
+        ydl_overrides=QUIET,
+        sleep=sleeps.append
+    )
+
+
+def test_download_and_repeat_submission_from_probe_cache(server, tmp_path):
+    sleeps = []
+    url = _url(server, "/clip.m4a")
+    with _downloader(tmp_path, sleeps) as downloader:
+        path, _ = downloader.download(url)
+        with open(path, 'rb') as f:
+            assert f.read() == AUDIO_BYTES
+        assert path.endswith(".m4a")
+
+        hits = len(server.hits)
+        assert downloader.download(url)[0] == path
+        assert len(server.hits) == hits
+
+    # The cache is on disk, so a new process also skips the network
+    with _downloader(tmp_path, sleeps) as downloader:
+        assert downloader.download(url)[0] == path
+    assert len(server.hits) == hits
+    assert sleeps == []
+
+
+def test_unavailable_video_does_not_open_breaker(server, tmp_path):
+    sleeps = []
+    with _downloader(tmp_path, sleeps) as downloader:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                downloader.download(_url(server, "/missing.m4a"))
+        assert downloader.breakers['yt-dlp'].failures == 0
+        assert downloader.breakers['yt-dlp'].allow()
+
+        path, _ = downloader.download(_url(server, "/clip.m4a"))
+        assert os.path.exists(path)
+
+
+def test_backoff_and_breaker_on_extractor_failures(server, tmp_path):
+    sleeps = []
+    with _downloader(tmp_path, sleeps) as downloader:
+        with pytest.raises(Exception, match="All download methods failed"):
+            downloader.download(_url(server, "/broken1.m4a"))
+        breaker = downloader.breakers['yt-dlp']
+        # Retries of one URL count once and back off with jittered, growing caps
+        assert breaker.failures == 1 and breaker.opened_at is None
+        assert len(sleeps) == downloader.max_attempts - 1
+        assert all(0 <= delay <= 2 ** attempt for attempt, delay in enumerate(sleeps))
+
+        for path in ("/broken2.m4a", "/broken3.m4a"):
+            with pytest.raises(Exception):
+                downloader.download(_url(server, path))
+        assert breaker.opened_at is not None
+
+        # Open circuit: a good URL fails fast without touching the server
+        with pytest.raises(Exception):
+            downloader.download(_url(server, "/clip.m4a"))
+        assert server.hits == []
+
+        # After the cool-down exactly one trial call is let through
+        breaker.opened_at -= breaker.reset_timeout
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.release()
+
+        path, _ = downloader.download(_url(server, "/clip.m4a"))
+        assert os.path.exists(path)
+        assert breaker.failures == 0 and breaker.opened_at is None
+
+
+def test_each_thread_gets_its_own_ydl(tmp_path):
+    with _downloader(tmp_path, []) as downloader:
+        ydls = []
+        threads = [threading.Thread(target=lambda: ydls.append(downloader.get_ydl())) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert ydls[0] is not ydls[1]
+        assert downloader.get_ydl() is downloader.get_ydl()
+        assert len(downloader._ydls) == 3
@@ -0,0 +1,73 @@
+import os
+import json
+from typing import Dict, List
+
+
+def chunk_offset(chunk: Dict) -> int:
+    """Checkpoint key for a chunk: its start time in milliseconds"""
+    return int(round(chunk['start'] * 1000))
+
+
+class TranscriptionCheckpoint:
+    """
+    Append-only log of per-chunk Whisper output for one video.
+
+    Each line is a JSON record {"offset": <ms>, "segments": [...]}, flushed
+    and fsynced as soon as the chunk finishes, so a crash loses at most the
+    chunk in flight. A torn final line from an interrupted write is ignored.
+    """
+    def __init__(self, video_id: str, directory: str = "checkpoints"):
+        self.video_id = video_id
+        self.path = os.path.join(directory, f"{video_id}.jsonl")
+        os.makedirs(directory, exist_ok=True)
+        self.completed = self._load()
+
+    def _load(self) -> Dict[int, List[Dict]]:
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping partial checkpoint record in {self.path}")
+                    continue
+                completed[record['offset']] = record['segments']
+        return completed
+
+    def is_done(self, chunk: Dict) -> bool:
+        return chunk_offset(chunk) in self.completed
+
+    def segments_for(self, chunk: Dict) -> List[Dict]:
+        return self.completed.get(chunk_offset(chunk), [])
+
+    def record(self, chunk: Dict, segments: List[Dict]):
+        """Persist a finished chunk (an empty list marks a silent chunk as done)"""
+        offset = chunk_offset(chunk)
+        line = json.dumps({'offset': offset, 'segments': segments})
+        with open(self.path, 'a', encoding='utf-8') as f:
+            # Start on a fresh line if a previous run died mid-write
+            if f.tell() > 0 and not self._ends_with_newline():
+                f.write("\n")
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.completed[offset] = segments
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def merge(self, chunks: List[Dict]) -> List[Dict]:
+        """All checkpointed segments in chunk order"""
+        results = []
+        for chunk in sorted(chunks, key=chunk_offset):
+            results.extend(self.segments_for(chunk))
+        return results
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.completed = {}
@@ -0,0 +1,165 @@
+import os
+import re
+import json
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+
+SUMMARY_DIR = "summaries"
+
+MAP_PROMPT = """Summarize this section of a video transcript in 2-3 sentences.
+Keep concrete facts, names and numbers.
+
+Transcript:
+{text}
+
+Summary:"""
+
+REDUCE_PROMPT = """These are summaries of consecutive parts of one video.
+Combine them into a single summary of 3-5 sentences covering all of the main points.
+
+Summaries:
+{text}
+
+Combined summary:"""
+
+SUMMARY_QUESTION_PATTERN = re.compile(
+    r'\b(summari[sz]e|summary|overview|recap|tl;?dr|key (points|takeaways)|main (ideas|points|topics))\b',
+    re.IGNORECASE
+)
+
+# Every word of a whole-video overview question must come from this list, so
+# anything topical ("about pricing", "the database section") goes to retrieval
+OVERVIEW_WORDS = {
+    "a", "an", "the", "of", "this", "that", "it", "its", "is", "are", "what", "and", "in",
+    "please", "can", "could", "would", "you", "me", "us", "give", "provide", "write", "list",
+    "show", "tell", "video", "whole", "entire", "full", "overall", "content", "talk",
+    "lecture", "episode", "clip", "brief", "short", "quick", "concise", "few", "some",
+    "bullet", "bullets", "sentence", "sentences", "summarize", "summarise", "summary",
+    "overview", "recap", "tl", "dr", "tldr", "key", "main", "points", "point", "ideas",
+    "idea", "takeaways", "takeaway", "topics", "topic", "all"
+}
+
+
+def is_summary_question(question: str) -> bool:
+    """Whole-video overview questions (no topical qualifier) that the precomputed tree can answer"""
+    if not SUMMARY_QUESTION_PATTERN.search(question):
+        return False
+    words = re.findall(r"[a-z]+", question.lower())
+    return all(word in OVERVIEW_WORDS for word in words)
+
+
+def format_timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+class ExtractiveSummarizer:
+    """Local stand-in for the LLM: keeps the sentences with the most frequent content words"""
+    def __init__(self, max_sentences: int = 3):
+        self.max_sentences = max_sentences
+
+    @staticmethod
+    def _content_words(sentence: str) -> List[str]:
+        return [w for w in re.findall(r"[a-z']+", sentence.lower()) if len(w) > 3]
+
+    def __call__(self, text: str, level: int) -> str:
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+|\n+', text) if s.strip()]
+        if len(sentences) <= self.max_sentences:
+            return " ".join(sentences)
+        sentence_words = [self._content_words(sentence) for sentence in sentences]
+        frequencies = Counter(w for words in sentence_words for w in words)
+        scores = [sum(frequencies[w] for w in words) / (len(words) or 1) for words in sentence_words]
+        best = sorted(range(len(sentences)), key=lambda idx: scores[idx], reverse=True)[:self.max_sentences]
+        return " ".join(sentences[idx] for idx in sorted(best))
+
+
+class LLMSummarizer:
+    """Map/reduce summaries from a LangChain chat model"""
+    def __init__(self, llm):
+        self.llm = llm
+
+    def __call__(self, text: str, level: int) -> str:
+        prompt = MAP_PROMPT if level == 0 else REDUCE_PROMPT
+        return self.llm.invoke(prompt.format(text=text)).content.strip()
+
+
+def build_summary_tree(
+    transcriptions: List[Dict],
+    summarize: Optional[Callable[[str, int], str]] = None,
+    window_s: float = 300.0,
+    fan_in: int = 4,
+    transcript: Optional[str] = None
+) -> Dict:
+    """
+    Map-reduce summary tree over fixed time windows.
+    Level 0 summarizes each window; each higher level merges `fan_in` nodes
+    until a single root covers the whole video. `transcript` is the fingerprint
+    of the transcript file the segments came from.
+    """
+    summarize = summarize or ExtractiveSummarizer()
+
+    windows = {}
+    for segment in transcriptions:
+        windows.setdefault(int(segment['start'] // window_s), []).append(segment)
+
+    level = []
+    for key in sorted(windows):
+        segments = windows[key]
+        text = " ".join(s['text'].strip() for s in segments)
+        level.append({
+            "start": segments[0]['start'],
+            "end": max(s['end'] if s['end'] is not None else s['start'] for s in segments),
+            "summary": summarize(text, 0)
+        })
+    if not level:
+        raise ValueError("Cannot summarize an empty transcription")
+
+    levels = [level]
+    while len(levels[-1]) > 1:
+        below = levels[-1]
+        levels.append([{
+            "start": group[0]["start"],
+            "end": group[-1]["end"],
+            "summary": summarize("\n".join(node["summary"] for node in group), len(levels))
+        } for group in (below[i:i + fan_in] for i in range(0, len(below), fan_in))])
+
+    return {
+        "transcript": transcript,
+        "window_s": window_s,
+        "fan_in": fan_in,
+        "levels": levels,
+        "root": levels[-1][0]["summary"]
+    }
+
+
+def summary_path(video_id: str, directory: str = SUMMARY_DIR) -> str:
+    return os.path.join(directory, f"{video_id}.json")
+
+
+def save_summary_tree(video_id: str, tree: Dict, directory: str = SUMMARY_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = summary_path(video_id, directory)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(tree, f, indent=2)
+    return path
+
+
+def load_summary_tree(video_id: str, directory: str = SUMMARY_DIR, transcript: Optional[str] = None) -> Optional[Dict]:
+    """Stored tree, or None if there is none or it was built from another `transcript` than the one given"""
+    path = summary_path(video_id, directory)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = json.load(f)
+    if transcript is not None and tree.get("transcript") != transcript:
+        return None
+    return tree
+
+
+def format_summary_answer(tree: Dict) -> str:
+    """Root summary followed by one timestamped line per section"""
+    lines = [tree["root"], "", "Main points by section:"]
+    for node in tree["levels"][0]:
+        lines.append(f"- [{format_timestamp(node['start'])}] {node['summary']}")
+    return "\n".join(lines)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Shared Whisper inference server.
+
+One long-running process owns the model; app workers send raw chunk audio
+over a Unix socket or local HTTP and requests from all callers are batched
+together until the batch is full or the oldest request hits its deadline.
+
+    python whisper_server.py --listen unix:///tmp/whisper.sock
+    WHISPER_SERVER_URL=unix:///tmp/whisper.sock python deployment/app.py
+"""
+import os
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import http.client
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse
+import numpy as np
+
+
+DEFAULT_LISTEN = "http://127.0.0.1:8765"
+
+
+class _PendingRequest:
+    def __init__(self, audio: np.ndarray, sampling_rate: int):
+        self.audio = audio
+        self.sampling_rate = sampling_rate
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BatchingInference:
+    """Collects requests from many callers and runs them through the pipeline in batches"""
+    def __init__(self, pipe, max_batch_size: int = 8, max_wait_ms: float = 50.0):
+        self.pipe = pipe
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, audio: np.ndarray, sampling_rate: int) -> Dict:
+        request = _PendingRequest(audio, sampling_rate)
+        self.requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _next_batch(self) -> List[_PendingRequest]:
+        batch = [self.requests.get()]
+        deadline = batch[0].enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Past the deadline, only take requests that are already waiting
+                if remaining <= 0:
+                    batch.append(self.requests.get_nowait())
+                else:
+                    batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _infer(self, batch: List[_PendingRequest]) -> List[Dict]:
+        return self.pipe(
+            [{"raw": r.audio, "sampling_rate": r.sampling_rate} for r in batch],
+            batch_size=len(batch),
+            return_timestamps=True
+        )
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                for request, output in zip(batch, self._infer(batch)):
+                    request.result = output
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0].error = e
+                else:
+                    # Rerun one by one so only the offending request gets the error
+                    for request in batch:
+                        try:
+                            request.result = self._infer([request])[0]
+                        except Exception as single_error:
+                            request.error = single_error
+            finally:
+                for request in batch:
+                    request.done.set()
+
+
+class _TranscribeHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/transcribe":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers["Content-Length"])
+            sampling_rate = int(self.headers.get("X-Sample-Rate", "16000"))
+            audio = np.frombuffer(self.rfile.read(length), dtype="<f4")
+            output = self.server.inference.submit(audio, sampling_rate)
+            self._send_json(200, output)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ("unix", 0)
+
+
+def make_server(listen: str, inference: BatchingInference):
+    address = urlparse(listen)
+    if address.scheme == "unix":
+        if os.path.exists(address.path):
+            os.remove(address.path)
+        server = _UnixHTTPServer(address.path, _TranscribeHandler)
+    elif address.scheme == "http":
+        port = address.port if address.port is not None else 80
+        server = ThreadingHTTPServer((address.hostname, port), _TranscribeHandler)
+    else:
+        raise ValueError(f"Unsupported listen address: {listen}")
+    server.inference = inference
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class WhisperServerClient:
+    """Sends chunk audio to a running whisper_server and returns the pipeline output"""
+    def __init__(self, url: str, timeout: float = 300.0):
+        self.address = urlparse(url)
+        self.timeout = timeout
+        if self.address.scheme not in ("unix", "http"):
+            raise ValueError(f"Unsupported Whisper server URL: {url}")
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.address.scheme == "unix":
+            return _UnixHTTPConnection(self.address.path, self.timeout)
+        return http.client.HTTPConnection(self.address.hostname, self.address.port or 80, timeout=self.timeout)
+
+    def transcribe(self, audio: np.ndarray, sampling_rate: int) -> Dict:
+        connection = self._connection()
+        try:
+            connection.request(
+                "POST", "/transcribe",
+                body=np.asarray(audio, dtype="<f4").tobytes(),
+                headers={
+                    "Content-Type": "application/octet-stream",
+                    "X-Sample-Rate": str(sampling_rate)
+                }
+            )
+            response = connection.getresponse()
+            payload = json.loads(response.read())
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise RuntimeError(f"Whisper server error: {payload.get('error', response.status)}")
+        return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared Whisper inference server")
+    parser.add_argument("--listen", default=os.getenv("WHISPER_SERVER_LISTEN", DEFAULT_LISTEN),
+                        help="unix:///path/to.sock or http://host:port")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    from whisper_transcriber import WhisperTranscriber
+    transcriber = WhisperTranscriber(server_url="")
+    inference = BatchingInference(transcriber.pipe, args.max_batch_size, args.max_wait_ms)
+
+    server = make_server(args.listen, inference)
+    print(f"Whisper server listening on {args.listen} "
+          f"(batch <= {args.max_batch_size}, wait <= {args.max_wait_ms:.0f} ms)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import os
 import time
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 import warnings
 import numpy as np
+from transcription_checkpoint import TranscriptionCheckpoint
+from whisper_server import WhisperServerClient
+from audio_processor import read_chunk_samples
 
 
 
@@ -14,24 +17,35 @@ warnings.filterwarnings("ignore", message="numpy.ufunc size changed")
 
 
 
-try:
-  import torch
-  from transformers import pipeline
-except ImportError as e:
-  raise ImportError(f"Required packages not installed: {str(e)}")
-
-
-
-
 class WhisperTranscriber:
-  def __init__(self):
-      """Initialize local Whisper-tiny transcriber"""
+  def __init__(self, server_url: Optional[str] = None):
+      """
+      Initialize local Whisper-tiny transcriber.
+      With `server_url` (or WHISPER_SERVER_URL) set, no model is loaded and
+      chunks are sent to a shared whisper_server process instead.
+      """
+      if server_url is None:
+          server_url = os.getenv("WHISPER_SERVER_URL", "")
+      self.client = None
+      if server_url:
+          self.client = WhisperServerClient(server_url)
+          self.pipe = None
+          print(f"Using Whisper server at {server_url}")
+          return
+    
       # Verify numpy is working
       try:
           np.zeros(1)
       except Exception as e:
           raise RuntimeError(f"NumPy initialization failed: {str(e)}")
     
+      # Only the local model needs torch; client-mode workers never import it
+      try:
+          import torch
+          from transformers import pipeline
+      except ImportError as e:
+          raise ImportError(f"Required packages not installed: {str(e)}")
+    
       # Initialize torch after numpy verification
       self.device = "cuda" if torch.cuda.is_available() else "cpu"
       self.model = "openai/whisper-tiny"
@@ -52,15 +66,43 @@ class WhisperTranscriber:
 
 
 
-  def transcribe_chunks(self, chunk_paths: List[Dict]) -> List[Dict]:
-      """Transcribe audio chunks locally using Whisper-tiny"""
+  def _infer(self, path: str) -> Dict:
+      """Run one chunk through the local pipeline or the shared server"""
+      if self.client is not None:
+          audio, sampling_rate = read_chunk_samples(path)
+          return self.client.transcribe(audio, sampling_rate)
+      return self.pipe(path, return_timestamps=True)
+
+
+
+
+  def transcribe_chunks(
+      self,
+      chunk_paths: List[Dict],
+      checkpoint: Optional[TranscriptionCheckpoint] = None,
+      on_chunk: Optional[Callable[[Dict, List[Dict]], None]] = None
+  ) -> List[Dict]:
+      """
+      Transcribe audio chunks locally using Whisper-tiny.
+      With a checkpoint, chunks already recorded are skipped and each newly
+      finished chunk is persisted before moving on. `on_chunk(chunk, segments)`
+      is called for every chunk as soon as its segments are available.
+      """
       results = []
       successful_chunks = 0
+      resumed_chunks = 0
 
 
 
 
       for chunk in chunk_paths:
+          if checkpoint is not None and checkpoint.is_done(chunk):
+              resumed_chunks += 1
+              successful_chunks += 1
+              if on_chunk is not None:
+                  on_chunk(chunk, checkpoint.segments_for(chunk))
+              continue
+
           try:
               # Verify file exists
               if not os.path.exists(chunk['path']):
@@ -71,23 +113,26 @@ class WhisperTranscriber:
 
 
               # Transcribe with error handling
-              output = self.pipe(
-                  chunk['path'],
-                  return_timestamps=True
-              )
+              output = self._infer(chunk['path'])
 
 
 
 
               # Process output
               if isinstance(output, dict) and "chunks" in output:
+                  segments = []
                   for segment in output["chunks"]:
-                      results.append({
+                      segments.append({
                           "text": segment["text"],
                           "start": chunk['start'] + segment["timestamp"][0],
                           "end": chunk['start'] + segment["timestamp"][1],
                           "path": chunk['path']
                       })
+                  if checkpoint is not None:
+                      checkpoint.record(chunk, segments)
+                  if on_chunk is not None:
+                      on_chunk(chunk, segments)
+                  results.extend(segments)
                   successful_chunks += 1
               else:
                   print(f"Unexpected output format from {chunk['path']}")
@@ -102,10 +147,15 @@ class WhisperTranscriber:
 
 
 
+      if checkpoint is not None:
+          results = checkpoint.merge(chunk_paths)
+
       if not results:
           raise RuntimeError("No chunks were successfully transcribed")
         
       print(f"\nTranscription complete!")
       print(f"- Successfully transcribed {successful_chunks}/{len(chunk_paths)} chunks")
+      if resumed_chunks:
+          print(f"- Resumed {resumed_chunks} chunks from checkpoint")
     
       return results
\ No newline at end of file
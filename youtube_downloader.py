@@ -1,13 +1,167 @@
 import os
+import re
+import json
+import hashlib
 import time
 import random
-from pathlib import Path
-from typing import Tuple
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
 import yt_dlp
 
 
+YOUTUBE_ID_PATTERN = re.compile(
+    r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|embed/|shorts/|live/|v/)|youtu\.be/)([A-Za-z0-9_-]{11})'
+)
+
+
+def extract_video_id(video_url: str) -> Optional[str]:
+    """Return the YouTube video ID embedded in a URL, if there is one"""
+    match = YOUTUBE_ID_PATTERN.search(video_url)
+    return match.group(1) if match else None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# Failures that belong to one video rather than to the extractor as a whole
+VIDEO_ERROR_PATTERN = re.compile(
+    r'video unavailable|private video|been removed|not available|members[- ]only|'
+    r'age[- ]restricted|confirm your age|copyright|unsupported url|does not exist|'
+    r'http error (404|410)',
+    re.IGNORECASE
+)
+
+
+class VideoUnavailableError(Exception):
+    """The requested video cannot be fetched by any extractor (deleted, private, bad URL...)"""
+
+
+def is_video_error(error: Exception) -> bool:
+    return bool(VIDEO_ERROR_PATTERN.search(str(error)))
+
+
+class CircuitBreaker:
+    """Stops calling an extractor after repeated failures until a cool-down has passed"""
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Closed, or open long enough that a single trial call (half-open) is let through"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_in_flight or self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self, count: bool = True):
+        """A failed call; `count=False` for repeats that were already counted (a failed trial still reopens)"""
+        with self._lock:
+            was_trial = self.trial_in_flight
+            self.trial_in_flight = False
+            if count:
+                self.failures += 1
+            if was_trial or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+    def release(self):
+        """End a trial call that said nothing about the extractor's health"""
+        with self._lock:
+            self.trial_in_flight = False
+
+
+class ProbeCache:
+    """Persistent map of URL -> video metadata and video ID -> downloaded file"""
+    def __init__(self, path: str):
+        self.path = path
+        self.urls = {}
+        self.videos = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.urls = data.get('urls', {})
+                self.videos = data.get('videos', {})
+            except Exception as e:
+                print(f"Ignoring unreadable probe cache {path}: {str(e)}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'urls': self.urls, 'videos': self.videos}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, video_url: str) -> Optional[Dict]:
+        video_id = self.urls.get(video_url) or extract_video_id(video_url)
+        return self.videos.get(video_id) if video_id else None
+
+    def remember(self, video_url: str, info: Dict) -> Dict:
+        video_id = info['id']
+        with self._lock:
+            entry = self.videos.setdefault(video_id, {'id': video_id})
+            entry.update({
+                'title': info.get('title', 'untitled'),
+                'extractor': info.get('extractor_key', 'unknown'),
+                'ext': info.get('ext'),
+            })
+            self.urls[video_url] = video_id
+            self._save()
+            return dict(entry)
+
+    def record_download(self, video_url: str, video_id: str, title: str, file_path: str):
+        with self._lock:
+            entry = self.videos.setdefault(video_id, {'id': video_id})
+            entry.update({'title': title, 'path': file_path})
+            self.urls[video_url] = video_id
+            self._save()
+
+    def forget(self, video_id: str):
+        """Drop a video's metadata and downloaded file"""
+        with self._lock:
+            entry = self.videos.pop(video_id, {})
+            self.urls = {url: vid for url, vid in self.urls.items() if vid != video_id}
+            self._save()
+        path = entry.get('path')
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def downloaded_path(self, video_id: str) -> Optional[str]:
+        path = self.videos.get(video_id, {}).get('path')
+        return path if path and os.path.exists(path) else None
+
+
 class YouTubeDownloader:
-    def __init__(self):
+    """
+    Audio downloader that keeps the original compressed stream (opus/m4a).
+
+    Browser cookies are loaded once per downloader and each thread reuses its
+    own YoutubeDL instance (they aren't thread-safe) for every URL it handles,
+    and metadata probes are cached on disk so repeated
+    submissions of a video are answered without fetching any audio. Tests can
+    point it at a local HTTP server by disabling browser cookies and passing
+    `ydl_overrides` and a no-op `sleep`.
+    """
+    def __init__(self, output_dir: str = 'audio_downloads', use_browser_cookies: bool = True,
+                 ydl_overrides: Optional[Dict] = None, max_attempts: int = 3,
+                 sleep: Callable[[float], None] = time.sleep):
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)',
@@ -20,16 +174,49 @@ class YouTubeDownloader:
             'https://www.reddit.com/',
             'https://www.twitter.com/'
         ]
+        self.output_dir = output_dir
+        self.use_browser_cookies = use_browser_cookies
+        self.ydl_overrides = ydl_overrides or {}
+        self.max_attempts = max_attempts
+        self.sleep = sleep
+        self.breakers = {}
+        self.probe_cache = ProbeCache(os.path.join(output_dir, 'probe_cache.json'))
+        self._local = threading.local()
+        self._ydls = []
+        self._cookies = None
+        self._cookies_loaded = False
+        self._probed_infos = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            ydls, self._ydls = self._ydls, []
+            self._local = threading.local()
+        for ydl in ydls:
+            ydl.close()
+
+    def get_cookies(self):
+        """Extract browser cookies for YouTube once per downloader"""
+        if not self._cookies_loaded:
+            self._cookies_loaded = True
+            if self.use_browser_cookies:
+                try:
+                    import browser_cookie3
+                    self._cookies = browser_cookie3.load(domain_name='youtube.com')
+                except Exception as e:
+                    print(f"Couldn't load browser cookies: {str(e)}")
+        return self._cookies
 
     def get_ydl_options(self):
-        return {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'wav',
-                'preferredquality': '5',
-            }],
-            'outtmpl': 'audio_downloads/%(title)s.%(ext)s',
+        options = {
+            'format': 'bestaudio[ext=webm]/bestaudio[ext=m4a]/bestaudio/best',
+            'outtmpl': os.path.join(self.output_dir, '%(id)s.%(ext)s'),
             'quiet': False,
             'no_warnings': False,
             'retries': 10,
@@ -43,20 +230,59 @@ class YouTubeDownloader:
                 'Accept-Encoding': 'gzip, deflate',
             },
             'socket_timeout': 30,
-            'extract_flat': True,
-            'force_generic_extractor': True,
             'noplaylist': True,
             'verbose': True
         }
+        options.update(self.ydl_overrides)
+        return options
+
+    def get_ydl(self) -> yt_dlp.YoutubeDL:
+        """This thread's YoutubeDL instance, created on first use with the shared cookies"""
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            with self._lock:
+                cookies = self.get_cookies()
+            ydl = yt_dlp.YoutubeDL(self.get_ydl_options())
+            if cookies is not None:
+                for cookie in cookies:
+                    ydl.cookiejar.set_cookie(cookie)
+            with self._lock:
+                self._local.ydl = ydl
+                self._ydls.append(ydl)
+        return ydl
+
+    def probe(self, video_url: str) -> Dict:
+        """Video metadata without downloading media, served from cache when known"""
+        cached = self.probe_cache.lookup(video_url)
+        if cached is not None:
+            return cached
+        info = self.get_ydl().extract_info(video_url, download=False)
+        self._probed_infos[video_url] = info
+        return self.probe_cache.remember(video_url, info)
 
     def download_with_ytdlp(self, video_url: str) -> Tuple[str, str]:
         """Primary download method with yt-dlp"""
         try:
-            with yt_dlp.YoutubeDL(self.get_ydl_options()) as ydl:
+            meta = self.probe(video_url)
+            existing = self.probe_cache.downloaded_path(meta['id'])
+            if existing:
+                print(f"Already downloaded {meta['id']}, reusing {existing}")
+                return existing, meta.get('title', 'untitled')
+
+            ydl = self.get_ydl()
+            info = self._probed_infos.pop(video_url, None)
+            if info is not None:
+                info = ydl.process_ie_result(info, download=True)
+            else:
                 info = ydl.extract_info(video_url, download=True)
-                file_path = ydl.prepare_filename(info).replace('.webm', '.wav').replace('.m4a', '.wav')
-                return file_path, info.get('title', 'untitled')
+            downloads = info.get('requested_downloads') or []
+            file_path = downloads[0].get('filepath') if downloads else ydl.prepare_filename(info)
+            title = info.get('title', 'untitled')
+            self.probe_cache.record_download(video_url, info['id'], title, file_path)
+            return file_path, title
         except Exception as e:
+            if is_video_error(e):
+                raise VideoUnavailableError(f"yt-dlp failed: {str(e)}")
             raise Exception(f"yt-dlp failed: {str(e)}")
 
     def download_with_pytube(self, video_url: str) -> Tuple[str, str]:
@@ -64,25 +290,95 @@ class YouTubeDownloader:
         try:
             from pytube import YouTube
             yt = YouTube(video_url, use_oauth=True, allow_oauth_cache=True)
+            existing = self.probe_cache.downloaded_path(yt.video_id)
+            if existing:
+                return existing, yt.title
             stream = yt.streams.filter(only_audio=True).first()
-            output_path = stream.download(output_path='audio_downloads')
+            output_path = stream.download(
+                output_path=self.output_dir,
+                filename=f"{yt.video_id}.{stream.subtype}"
+            )
+            self.probe_cache.record_download(video_url, yt.video_id, yt.title, output_path)
             return output_path, yt.title
         except Exception as e:
+            if is_video_error(e):
+                raise VideoUnavailableError(f"pytube failed: {str(e)}")
             raise Exception(f"pytube failed: {str(e)}")
 
+    def _breaker(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            if name not in self.breakers:
+                self.breakers[name] = CircuitBreaker()
+            return self.breakers[name]
 
-def download_youtube_audio(video_url: str) -> Tuple[str, str]:
-    """Main download function with multiple fallbacks"""
-    downloader = YouTubeDownloader()
-    methods = [
-        downloader.download_with_ytdlp,
-        downloader.download_with_pytube
-    ]
-    for attempt in range(3):
-        for method in methods:
+    def download(self, video_url: str) -> Tuple[str, str]:
+        """
+        Try each extractor in turn, backing off between rounds.
+        A URL adds at most one failure to each breaker however often it is
+        retried, and errors about the video itself never count against one.
+        """
+        methods = [
+            ('yt-dlp', self.download_with_ytdlp),
+            ('pytube', self.download_with_pytube)
+        ]
+        counted = set()
+        for attempt in range(self.max_attempts):
+            video_errors = 0
+            for name, method in methods:
+                breaker = self._breaker(name)
+                if not breaker.allow():
+                    print(f"Attempt {attempt + 1}: skipping {name}, circuit open")
+                    continue
+                try:
+                    result = method(video_url)
+                    breaker.record_success()
+                    return result
+                except VideoUnavailableError as e:
+                    breaker.release()
+                    video_errors += 1
+                    print(f"Attempt {attempt + 1} with {name} failed: {str(e)}")
+                except Exception as e:
+                    breaker.record_failure(count=name not in counted)
+                    counted.add(name)
+                    print(f"Attempt {attempt + 1} with {name} failed: {str(e)}")
+            if video_errors == len(methods):
+                # Retrying won't bring back a deleted or private video
+                raise VideoUnavailableError(f"Video unavailable: {video_url}")
+            if attempt < self.max_attempts - 1:
+                self.sleep(backoff_delay(attempt))
+        raise Exception(f"All download methods failed after {self.max_attempts} attempts each")
+
+    def download_batch(self, video_urls: List[str]) -> List[Optional[Tuple[str, str]]]:
+        """Download several videos over the same session; failed entries are None"""
+        results = []
+        for video_url in video_urls:
             try:
-                return method(video_url)
+                results.append(self.download(video_url))
             except Exception as e:
-                print(f"Attempt {attempt + 1} with {method.__name__} failed: {str(e)}")
-                time.sleep(random.randint(2, 5))
-    raise Exception("All download methods failed after 3 attempts each")
+                print(f"Skipping {video_url}: {str(e)}")
+                results.append(None)
+        return results
+
+
+_default_downloader = None
+_default_downloader_lock = threading.Lock()
+
+
+def get_downloader() -> YouTubeDownloader:
+    """Process-wide downloader so sessions, cookies and breakers survive across requests"""
+    global _default_downloader
+    with _default_downloader_lock:
+        if _default_downloader is None:
+            _default_downloader = YouTubeDownloader()
+        return _default_downloader
+
+
+def download_youtube_audio(video_url: str) -> Tuple[str, str]:
+    """Main download function with multiple fallbacks"""
+    return get_downloader().download(video_url)
+
+
+def video_id_for(video_url: str) -> str:
+    """Stable per-video key for a submitted URL, used to name checkpoints and indexes"""
+    video_id = extract_video_id(video_url) or get_downloader().probe_cache.urls.get(video_url)
+    return video_id or hashlib.sha1(video_url.encode('utf-8')).hexdigest()[:16]